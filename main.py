@@ -1,10 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-from statsmodels.tsa.api import ExponentialSmoothing
-from PIL import Image
 
 # Page configuration
 st.set_page_config(
@@ -14,8 +13,15 @@ st.set_page_config(
 )
 
 # Top banner
-image_banner = Image.open('ds.png')  # Replace with your image file
-st.image(image_banner, width='stretch')
+BANNER_PATH = 'ds.png'  # Replace with your image file
+
+@st.cache_resource
+def load_banner():
+    """Membaca file banner sekali per proses (tanpa decode PIL di setiap rerun)."""
+    with open(BANNER_PATH, 'rb') as f:
+        return f.read()
+
+st.image(load_banner(), width='stretch')
 
 st.title("Forecasting Penjualan Kaos")
 st.write("Menggunakan metode Triple Exponential Smoothing (Holt-Winters) untuk peramalan penjualan kaos pada toko Kaosdisablon")
@@ -30,57 +36,287 @@ FILE_MAP = {
 TREND_TYPE = "mul"
 SEASONAL_TYPE = "mul"
 
+# Nilai awal smoothing untuk pre-fit heuristik (alpha, beta, gamma)
+HW_START_SMOOTHING = (0.3, 0.1, 0.1)
+# Batas iterasi optimizer; Holt-Winters bulanan m=12 konvergen jauh sebelum default
+HW_MINIMIZE_KWARGS = {"options": {"maxiter": 50, "ftol": 1e-6}}
+
+MAX_FORECAST_MONTHS = 36
+DATE_FORMAT = "%Y-%m-%d"
+
 # FUNGSI PEMUATAN DATA (Satu Fungsi untuk Semua Kategori)
 # ---------------------------------------------------------
+class Data(NamedTuple):
+    """Data historis satu kategori: nilai float64 contiguous dan index bulanan disimpan terpisah."""
+    values: np.ndarray
+    index: pd.DatetimeIndex
+    name: str
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+def read_monthly_series(file_path, category_name):
+    """Membaca file csv dan mengembalikan series dengan frekuensi bulanan (tanpa pemanggilan st)."""
+    # Baca header saja untuk menentukan kolom Waktu dan Nilai
+    columns = pd.read_csv(file_path, nrows=0).columns
+    date_col = columns[columns.str.contains('date', case=False, regex=False)][0]
+    value_col = columns[columns != date_col][0]
+
+    # Parser pyarrow + format tanggal eksplisit (tanpa inferensi format per baris);
+    # kolom nilai langsung dibaca sebagai float64 (sel kosong menjadi NaN)
+    df = pd.read_csv(
+        file_path,
+        engine="pyarrow",
+        usecols=[date_col, value_col],
+        parse_dates=[date_col],
+        date_format=DATE_FORMAT,
+        dtype={value_col: "float64"}
+    )
+    # index_col tidak dipakai bersama dtype per kolom (IndexError di engine pyarrow)
+    df.set_index(date_col, inplace=True)
+    
+    series = df[value_col].dropna()
+    series = series.asfreq('MS')
+
+    return series.rename(category_name)
+
 @st.cache_data
 def load_and_preprocess_data(file_path, category_name):
-    """Memuat data dari file path dan mengembalikan series dengan frekuensi bulanan."""
+    """Memuat data dari file path dan mengembalikan Data (values, index, name) dengan frekuensi bulanan."""
+    empty_data = Data(np.empty(0, dtype=np.float64), pd.DatetimeIndex([]), category_name)
     try:
-        df = pd.read_csv(file_path)
+        series = read_monthly_series(file_path, category_name)
     except FileNotFoundError:
         st.error(f"⚠️ File data '{file_path}' untuk {category_name} TIDAK DITEMUKAN.")
-        return pd.Series()
+        return empty_data
     except Exception as e:
         st.error(f"Error saat memuat data: {e}")
-        return pd.Series()
+        return empty_data
 
-    # Asumsi kolom pertama adalah Waktu, kolom kedua adalah Nilai
-    date_col = [col for col in df.columns if 'date' in col.lower()][0]
-    value_col = [col for col in df.columns if col not in [date_col]][0]
+    st.sidebar.success(f"Data {category_name} berhasil dimuat.")
+    values = np.ascontiguousarray(series.to_numpy(dtype=np.float64))
+    return Data(values, series.index.as_unit("ns"), category_name)
 
-    df[date_col] = pd.to_datetime(df[date_col])
-    df.set_index(date_col, inplace=True)
-    
-    series = pd.to_numeric(df[value_col], errors='coerce').dropna()
-    series = series.asfreq('MS')
+# Statistik ringkas dihitung sekali per isi data (bytes array sebagai kunci cache)
+@st.cache_data
+def series_stats(values_bytes, n):
+    """Mengembalikan (rata-rata, maksimum, minimum, standar deviasi) dari data penjualan."""
+    arr = np.frombuffer(values_bytes, dtype=np.float64, count=n)
+    return np.nanmean(arr), np.nanmax(arr), np.nanmin(arr), np.nanstd(arr, ddof=1)
 
-    st.sidebar.success(f"Data {category_name} berhasil dimuat.")
-    return series.rename(category_name)
+# Tabel 24 bulan terakhir dibangun sekali per kategori lalu tinggal ditampilkan
+@st.cache_data
+def tail_frame(values_bytes, index_i8, index_name):
+    """Membangun DataFrame 24 bulan terakhir dari bytes nilai dan index (int64 nanodetik)."""
+    # Slice 24 nilai terakhir dulu, lalu bangun DataFrame sekali dengan nama kolom final
+    index = np.frombuffer(index_i8, dtype="i8").view("datetime64[ns]")[-24:]
+    values = np.frombuffer(values_bytes, dtype=np.float64)[-24:]
+    return pd.DataFrame({"Unit Penjualan": values}, index=pd.DatetimeIndex(index, name=index_name))
 
 # Fungsi Modelling dan Forecasting
-@st.cache_resource
-def run_holt_winters_forecast(series, n_months):
-    """Melakukan fitting model Holt-Winters dan membuat forecast."""
+# Library model/plot di-import saat pertama dipakai agar tidak memperlambat render awal
+def _forecast_index(series, n_months):
+    """Index bulanan (awal bulan) untuk n_months setelah titik terakhir data historis."""
+    return pd.date_range(series.index[-1] + pd.offsets.MonthBegin(1), periods=n_months, freq="MS")
+
+def run_holt_winters_forecast(series):
+    """Melakukan fitting model Holt-Winters dan membuat forecast 36 bulan.
+
+    Forecast horizon k sama dengan k nilai pertama forecast horizon 36,
+    sehingga semua pilihan slider cukup men-slice hasil satu kali fitting.
+    """
+    n_months = MAX_FORECAST_MONTHS
+    from statsmodels.tsa.api import ExponentialSmoothing
+
+    # Pre-fit murah (tanpa optimasi) dengan inisialisasi heuristik untuk mendapatkan warm start
+    alpha, beta, gamma = HW_START_SMOOTHING
+    heuristic_fit = ExponentialSmoothing(
+        series,
+        seasonal_periods=12,
+        trend=TREND_TYPE,
+        seasonal=SEASONAL_TYPE,
+        initialization_method="heuristic"
+    ).fit(smoothing_level=alpha, smoothing_trend=beta, smoothing_seasonal=gamma, optimized=False)
+    params = heuristic_fit.params
+
+    # Urutan parameter bebas statsmodels: [alpha, beta, gamma, l0, b0, s0..s11] (phi tetap, tanpa damping)
+    start_params = np.r_[
+        params["smoothing_level"],
+        params["smoothing_trend"],
+        params["smoothing_seasonal"],
+        params["initial_level"],
+        params["initial_trend"],
+        params["initial_seasons"]
+    ]
+
+    # Model Holt-Winters: Trend Multiplikatif, Seasonal Multiplikatif, m=12
+    model = ExponentialSmoothing(
+        series,
+        seasonal_periods=12,
+        trend=TREND_TYPE,
+        seasonal=SEASONAL_TYPE,
+        initialization_method="estimated"
+    )
+    
+    # Fitting model: warm start, tanpa grid search brute-force, iterasi L-BFGS-B dibatasi
+    model_fit = model.fit(
+        optimized=True,
+        start_params=start_params,
+        use_brute=False,
+        method="L-BFGS-B",
+        remove_bias=False,
+        minimize_kwargs=HW_MINIMIZE_KWARGS
+    )
+    
+    # Forecast (nilai saja; index dibangun sendiri tanpa aritmetika offset per langkah statsmodels)
+    forecast_values = np.asarray(model_fit.forecast(n_months), dtype=np.float64)
+    return pd.Series(forecast_values, index=_forecast_index(series, n_months), name=series.name)
+
+def _fit_category(file_path, category_name):
+    """Worker thread: memuat data satu kategori lalu melatih model sekali untuk horizon maksimum."""
     try:
-        # Model Holt-Winters: Trend Multiplikatif, Seasonal Multiplikatif, m=12
-        model = ExponentialSmoothing(
-            series,
-            seasonal_periods=12,
-            trend=TREND_TYPE,
-            seasonal=SEASONAL_TYPE,
-            initialization_method="estimated"
-        )
+        series = read_monthly_series(file_path, category_name)
+        return run_holt_winters_forecast(series), None
+    except Exception as e:
+        return None, e
+
+@st.cache_resource(show_spinner="Menyiapkan model forecasting untuk semua kategori...")
+def build_forecast_cache():
+    """Melatih model untuk semua kategori sekali saat startup dan menyimpan forecast 36 bulan."""
+    # Ketiga kategori dilatih paralel (statsmodels melepas GIL saat optimasi scipy/BLAS)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = {
+            category: executor.submit(_fit_category, path, category)
+            for category, path in FILE_MAP.items()
+        }
+        return {category: future.result() for category, future in futures.items()}
+
+# Fungsi Visualisasi
+# Series dan Data di-hash berdasarkan isinya agar figure hanya dibangun ulang saat data berubah
+def _series_content_key(s):
+    return (s.name, s.index.asi8.tobytes(), s.values.tobytes())
+
+SERIES_HASH_FUNCS = {pd.Series: _series_content_key, Data: _series_content_key}
+
+@st.cache_data(hash_funcs=SERIES_HASH_FUNCS)
+def build_trend_fig(data):
+    """Membangun grafik penjualan historis (Plotly)."""
+    import plotly.express as px
+
+    fig = px.line(
+        x=data.index,
+        y=data.values,
+        title=f"Penjualan Bulanan - {data.name}",
+        labels={"x": "Waktu", "y": "Unit Penjualan"},
+        color_discrete_sequence=["blue"]
+    )
+    fig.update_traces(name=f"Penjualan Bulanan ({data.name})", showlegend=True)
+    fig.update_xaxes(showgrid=True)
+    fig.update_yaxes(showgrid=True)
+    return fig
+
+@st.cache_data(hash_funcs=SERIES_HASH_FUNCS)
+def build_forecast_fig(data, forecast):
+    """Membangun grafik data historis beserta hasil forecast (Plotly)."""
+    fig = build_trend_fig(data)
+    fig.update_layout(title=f"Hasil Forecasting Holt-Winters - {data.name}")
+    fig.update_traces(name="Data Historis (Bulanan)")
+
+    # Garis batas peramalan di titik terakhir data historis; dibuat sebagai trace
+    # (bukan add_vline) agar muncul di legend
+    y_min = min(np.nanmin(data.values), forecast.min())
+    y_max = max(np.nanmax(data.values), forecast.max())
+    fig.add_scatter(
+        x=[data.index[-1], data.index[-1]],
+        y=[y_min, y_max],
+        mode="lines",
+        name="Batas Peramalan Masa Depan",
+        line=dict(color="grey", dash="dot")
+    )
+
+    # Plot hasil forecast
+    fig.add_scatter(
+        x=forecast.index,
+        y=forecast.values,
+        mode="lines",
+        name=f"Forecast {len(forecast)} Bulan",
+        line=dict(color="green", width=3)
+    )
+    return fig
+
+
+# Tabel & file hasil forecast
+def build_forecast_frame(values, index):
+    """Membangun tabel hasil forecast (Bulan sebagai teks YYYY-MM-DD, nilai dibulatkan)."""
+    # Cast datetime64 -> hari -> teks dilakukan sekaligus oleh NumPy
+    return pd.DataFrame({
+        'Bulan': np.asarray(index, dtype='datetime64[D]').astype(str),
+        'Forecast_Unit_Penjualan': np.round(values, 0)
+    })
+
+@st.cache_data
+def forecast_csv_bytes(category, horizon, values_bytes, index_i8):
+    """Mengembalikan isi CSV (UTF-8) hasil forecast, di-cache per kategori dan horizon."""
+    values = np.frombuffer(values_bytes, dtype=np.float64)
+    index = pd.DatetimeIndex(np.frombuffer(index_i8, dtype="i8").view("datetime64[ns]"))
+    return build_forecast_frame(values, index).to_csv(index=False).encode('utf-8')
+
+
+# Tab Forecast
+# Dijalankan sebagai fragment: perubahan slider/tombol hanya me-rerun bagian ini,
+# bukan pemuatan data, statistik Tab 1 dan grafik Tab 2
+@st.fragment
+def forecast_tab(data, full_forecast, fit_error):
+    """Menampilkan input horizon, plot, tabel dan tombol download hasil forecast."""
+    # Input jumlah bulan forecast (di dalam fragment karena fragment tidak dapat menulis ke sidebar)
+    forecast_months = st.slider(
+        "Tentukan Jumlah Bulan Forecast",
+        min_value=1,
+        max_value=MAX_FORECAST_MONTHS, 
+        value=12,
+        step=1
+    )
+
+    st.header(f"Plot Hasil Forecast {forecast_months} Bulan")
+    
+    # Tombol untuk memicu pelatihan model
+    if st.button("Jalankan Forecasting", type="primary"):
         
-        # Fitting model
-        model_fit = model.fit()
+        # Forecast sudah dihitung sebelumnya (tanpa melatih ulang model)
+        if full_forecast is None:
+            st.error(f"FATAL ERROR: Gagal melatih model. Error: {fit_error}")
+            st.warning("Forecast tidak dapat dijalankan karena model gagal dibuat.")
+            st.stop()
+
+        forecast = full_forecast.iloc[:forecast_months]
+
+        # --- Visualisasi Hasil ---
+        st.plotly_chart(build_forecast_fig(data, forecast), width='stretch')
         
-        # Forecast
-        forecast = model_fit.forecast(n_months)
+        # --- Tampilkan Hasil Forecast dalam Tabel ---
+        forecast_values = forecast.to_numpy(dtype=np.float64)
+        forecast_df = build_forecast_frame(forecast_values, forecast.index)
         
-        return model_fit, forecast
-    except Exception as e:
-        st.error(f"FATAL ERROR: Gagal melatih model. Error: {e}")
-        return None, None
+        st.subheader("Data Hasil Forecast")
+        st.dataframe(forecast_df, hide_index=True, width='stretch')
+        
+        # --- Tambahkan Download Button ---
+        csv = forecast_csv_bytes(
+            data.name,
+            forecast_months,
+            forecast_values.tobytes(),
+            forecast.index.as_unit("ns").asi8.tobytes()
+        )
+        st.download_button(
+            label="📥 Download Hasil Forecast (CSV)",
+            data=csv,
+            file_name=f'forecast_results_{data.name.replace(" ", "_")}.csv',
+            mime='text/csv',
+        )
+        
+    else:
+        st.info("Pilih kategori di sidebar, tentukan jumlah bulan forecast, lalu tekan tombol 'Jalankan Forecasting' untuk melihat hasilnya.")
 
 
 # Sidebar
@@ -93,20 +329,11 @@ selected_category = st.sidebar.selectbox(
 )
 file_path = FILE_MAP[selected_category]
 
-# Input jumlah bulan forecast
-forecast_months = st.sidebar.slider(
-    "Tentukan Jumlah Bulan Forecast",
-    min_value=1,
-    max_value=36, 
-    value=12,
-    step=1
-)
-
 # Main Tab
 # Pemuatan data
-series = load_and_preprocess_data(file_path, selected_category)
+data = load_and_preprocess_data(file_path, selected_category)
 
-if series.empty:
+if data.empty:
     st.error("Aplikasi tidak dapat melanjutkan karena data historis kosong atau gagal dimuat.")
     st.stop()
 
@@ -118,40 +345,37 @@ tab1, tab2, tab3 = st.tabs(["1. Dataset Historis", "2. Grafik Historis", "3. Has
 with tab1:
     st.header(f"Dataset Historis ({selected_category})")
     st.write(f"Data historis telah diubah menjadi format bulanan (Monthly Time Series).")
-    st.dataframe(series.to_frame().tail(24).rename(columns={selected_category: "Unit Penjualan"}), width='stretch') 
+    st.dataframe(tail_frame(data.values.tobytes(), data.index.asi8.tobytes(), data.index.name), width='stretch') 
     
     st.subheader("Informasi Data")
     # Bagian Periode dan Jumlah Data
-    st.write(f"Periode data historis: **{series.index.min().strftime('%Y-%m-%d')}** s/d **{series.index.max().strftime('%Y-%m-%d')}**")
-    st.write(f"Total data bulanan: **{len(series)}** bulan")
+    st.write(f"Periode data historis: **{data.index.min().strftime('%Y-%m-%d')}** s/d **{data.index.max().strftime('%Y-%m-%d')}**")
+    st.write(f"Total data bulanan: **{len(data.values)}** bulan")
 
     st.subheader("Analisis Statistik Kunci")
     col1, col2, col3, col4 = st.columns(4)
+    mean_val, max_val, min_val, std_val = series_stats(data.values.tobytes(), len(data.values))
 
     # Rata-rata (Warna Biru / Info)
     with col1:
-        mean_val = series.mean()
         with st.container(border=True): # Menggunakan container dengan border
             st.metric(label="Rata-Rata Penjualan", value=f"{mean_val:,.0f} Unit")
         
     
     # Maksimum (Warna Hijau / Success)
     with col2:
-        max_val = series.max()
         with st.container(border=True):
             st.metric(label="Penjualan Tertinggi", value=f"{max_val:,.0f} Unit", delta="Max")
           
         
     # Minimum (Warna Kuning / Warning)
     with col3:
-        min_val = series.min()
         with st.container(border=True):
             st.metric(label="Penjualan Terendah", value=f"{min_val:,.0f} Unit", delta="Min")
             
 
     # Standar Deviasi (Warna Merah / Error - untuk volatilitas)
     with col4:
-        std_val = series.std()
         with st.container(border=True):
             st.metric(label="Standar Deviasi", value=f"{std_val:,.0f} Unit", help="Menunjukkan seberapa bervariasinya data penjualan dari rata-rata.")
         
@@ -160,70 +384,10 @@ with tab1:
 with tab2:
     st.header("Grafik Penjualan Historis")
     
-    fig_trend, ax_trend = plt.subplots(figsize=(10, 5))
-    ax_trend.plot(series, label=f'Penjualan Bulanan ({selected_category})', color='blue')
-    ax_trend.set_title(f"Penjualan Bulanan - {selected_category}")
-    ax_trend.set_xlabel("Waktu")
-    ax_trend.set_ylabel("Unit Penjualan")
-    ax_trend.legend()
-    ax_trend.grid(True)
-    st.pyplot(fig_trend)
+    st.plotly_chart(build_trend_fig(data), width='stretch')
 
 # --- TAB 3: HASIL FORECAST ---
 with tab3:
-    st.header(f"Plot Hasil Forecast {forecast_months} Bulan")
-    
-    # Tombol untuk memicu pelatihan model
-    if st.button("Jalankan Forecasting", type="primary"):
-        
-        # Run model (model dilatih dari awal setiap tombol ditekan)
-        model_fit, forecast = run_holt_winters_forecast(series, forecast_months)
-
-        if model_fit is None:
-            st.warning("Forecast tidak dapat dijalankan karena model gagal dibuat.")
-            st.stop()
-
-        # --- Visualisasi Hasil ---
-        fig_forecast, ax_forecast = plt.subplots(figsize=(12, 6))
-        
-        # Plot data historis
-        ax_forecast.plot(series, label='Data Historis (Bulanan)', color='blue')
-        
-        # Plot garis batas peramalan di titik terakhir data historis
-        # Gunakan index[-1] untuk mendapatkan titik waktu terakhir dari data series
-        ax_forecast.axvline(x=series.index[-1], color='grey', linestyle=':', label='Batas Peramalan Masa Depan')
-        
-        # Plot hasil forecast
-        ax_forecast.plot(forecast, label=f'Forecast {forecast_months} Bulan', color='green', linewidth=2)
-        
-        ax_forecast.set_title(f"Hasil Forecasting Holt-Winters - {selected_category}")
-        ax_forecast.set_xlabel("Waktu")
-        ax_forecast.set_ylabel("Unit Penjualan")
-        ax_forecast.legend()
-        ax_forecast.grid(True)
-        st.pyplot(fig_forecast)
-        
-        # --- Tampilkan Hasil Forecast dalam Tabel ---
-        forecast_df = pd.DataFrame({
-            'Bulan': forecast.index,
-            'Forecast_Unit_Penjualan': forecast.round(0).values
-        })
-        forecast_df['Bulan'] = forecast_df['Bulan'].dt.strftime('%Y-%m-%d')
-        
-        st.subheader("Data Hasil Forecast")
-        st.dataframe(forecast_df, hide_index=True, width='stretch')
-        
-        # --- Tambahkan Download Button ---
-        csv = forecast_df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Download Hasil Forecast (CSV)",
-            data=csv,
-            file_name=f'forecast_results_{selected_category.replace(" ", "_")}.csv',
-            mime='text/csv',
-        )
-        
-    else:
-
-        st.info("Pilih kategori di sidebar dan tekan tombol 'Jalankan Forecasting' untuk melihat hasilnya.")
-
-
+    # Forecast semua kategori dihitung sekali (setelah Tab 1 & 2 tampil), tombol forecast cukup membaca tabel ini
+    forecast_cache = build_forecast_cache()
+    forecast_tab(data, *forecast_cache[selected_category])